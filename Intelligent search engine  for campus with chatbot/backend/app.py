@@ -1,6 +1,6 @@
 import os
 import shutil
-from functools import wraps
+from functools import lru_cache, wraps
 from datetime import timedelta
 from uuid import uuid4
 
@@ -9,19 +9,37 @@ try:
 except ImportError:  # pragma: no cover - optional dependency
 	load_dotenv = None
 
+try:
+	from flask_compress import Compress
+except ImportError:  # pragma: no cover - optional dependency
+	Compress = None
+
+try:
+	from argon2 import PasswordHasher
+	from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:  # pragma: no cover - optional dependency
+	PasswordHasher = None
+
+try:
+	from gevent import get_hub
+	from gevent import monkey as gevent_monkey
+except ImportError:  # pragma: no cover - optional dependency
+	gevent_monkey = None
+
 from flask import Flask, abort, jsonify, redirect, render_template, request, send_from_directory, url_for, session
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
 
-from ingestion.pdfreader import extract_text_from_pdf
+from ingestion.pdfreader import iter_pdf_text
 from search_engine import CampusSearchEngine
-from database import init_db, add_user, get_user, get_user_by_email
+from database import init_db, add_user, email_exists, get_user_by_email, release_connection
 
 
 TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "..", "frontend", "templates")
 STATIC_DIR = os.path.join(os.path.dirname(__file__), "..", "frontend", "static")
 UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "uploads")
 ADMIN_UPLOAD_DIR = os.path.join(UPLOAD_DIR, "admin_uploaded_files")
+INDEX_PATH = os.path.join(os.path.dirname(__file__), "index.pkl")
 PROFILE_IMAGE_DIR = os.path.join(STATIC_DIR, "images", "profiles")
 ALLOWED_EXTENSIONS = {
 	"pdf",
@@ -126,6 +144,39 @@ def get_uploaded_files():
 	return sorted(items, key=lambda item: item["updated_at"], reverse=True)
 
 
+# Argon2id tuned to stay responsive under login load; werkzeug's PBKDF2 is the fallback.
+password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1) if PasswordHasher else None
+
+
+def hash_password(password: str) -> str:
+	if password_hasher is not None:
+		return password_hasher.hash(password)
+	return generate_password_hash(password)
+
+
+def verify_password(stored_hash: str, password: str) -> bool:
+	# Accounts created before Argon2 was enabled keep their werkzeug hashes.
+	if stored_hash.startswith("$argon2"):
+		if password_hasher is None:
+			return False
+		try:
+			return password_hasher.verify(stored_hash, password)
+		except (VerificationError, InvalidHashError):
+			return False
+	return check_password_hash(stored_hash, password)
+
+
+def run_password_task(func, *args):
+	"""Run a CPU-heavy password hash/verify without stalling other requests."""
+	if gevent_monkey is not None and gevent_monkey.is_module_patched("threading"):
+		# Every greenlet shares one OS thread, so hash in gevent's native threadpool;
+		# Argon2 and hashlib release the GIL, letting other greenlets run meanwhile.
+		return get_hub().threadpool.apply(func, args)
+	# Threaded servers already give each request its own thread, and hashing there
+	# releases the GIL too, so handing off to another thread would only add latency.
+	return func(*args)
+
+
 def allowed_image_file(filename: str) -> bool:
 	if "." not in filename:
 		return False
@@ -134,7 +185,9 @@ def allowed_image_file(filename: str) -> bool:
 
 
 app = Flask(__name__, template_folder=TEMPLATES_DIR, static_folder=STATIC_DIR, static_url_path='/static')
-search_index = CampusSearchEngine()
+if Compress is not None:
+	Compress(app)
+search_index = CampusSearchEngine(index_path=INDEX_PATH)
 
 # Sample campus directory and notifications for MVP
 FACULTY_DIRECTORY = [
@@ -166,9 +219,26 @@ app.config["SESSION_COOKIE_SECURE"] = False  # Set to True in production with HT
 app.config["SESSION_COOKIE_HTTPONLY"] = True
 app.config["SESSION_COOKIE_SAMESITE"] = "Lax"
 app.config["PERMANENT_SESSION_LIFETIME"] = timedelta(days=7)
+# Hand file downloads to the front-end web server (Apache mod_xsendfile, lighttpd)
+# instead of streaming them through Python. Only enable behind such a server.
+app.config["USE_X_SENDFILE"] = os.environ.get("USE_X_SENDFILE") == "1"
 
 # Initialize the database
 init_db()
+release_connection()
+
+
+@app.before_request
+def _sync_search_index():
+	# Each server worker holds its own index; pick up uploads/deletes made by other workers.
+	if search_index.refresh():
+		_autocomplete_suggestions.cache_clear()
+
+
+@app.teardown_appcontext
+def _release_db_connection(exception=None):
+	# Hand the request's SQLite connection back to the pool for the next request.
+	release_connection()
 
 
 # ===== AUTHENTICATION DECORATORS =====
@@ -257,13 +327,17 @@ def _smart_ranked_search(query: str):
 			combined_scores[doc_id] = combined_scores.get(doc_id, 0) + (score * weight) + base_bonus
 
 	# Run all supported search modes automatically and rank by weighted relevance.
-	add_scores(search_index.keyword_search(query), weight=5)
-	add_scores(search_index.prefix_search(query), weight=3)
+	# BM25 gives about idf (0.3-3) per single occurrence, where the raw term counts
+	# used before gave 1, so the content weights are scaled up to keep strong content
+	# matches ahead of the flat filename bonuses below.
+	add_scores(search_index.keyword_search(query), weight=20)
+	add_scores(search_index.prefix_search(query), weight=12)
 	add_scores(search_index.filename_search(query, prefix=False), weight=6, base_bonus=2)
 	add_scores(search_index.filename_search(query, prefix=True), weight=8, base_bonus=3)
 
 	lower_query = query.lower()
-	for doc_id, meta in search_index.documents.items():
+	# Copy the items so a concurrent upload cannot resize the dict mid-iteration.
+	for doc_id, meta in list(search_index.documents.items()):
 		title = meta.get("title", "").lower()
 		filename = meta.get("filename", "").lower()
 		if lower_query and (title == lower_query or filename == lower_query):
@@ -336,7 +410,7 @@ def _collect_search_results(
 		results.append({
 			"title": meta["title"],
 			"filename": meta["filename"],
-			"score": score,
+			"score": round(score, 2),
 			"category": meta.get("category", "Documents"),
 			"department": facets.get("department"),
 			"service_type": facets.get("service_type"),
@@ -420,14 +494,14 @@ def signup():
 		errors.append("Invalid role selected")
 	
 	# Check if email already exists
-	if not errors and get_user_by_email(email):
+	if not errors and email_exists(email):
 		errors.append("Email already registered")
 	
 	if errors:
 		return render_template("signup.html", errors=errors), 400
 	
 	# Hash password and add user to database
-	hashed_password = generate_password_hash(password)
+	hashed_password = run_password_task(hash_password, password)
 	success, message = add_user(name, email, hashed_password, role, phone=phone, department=department, course=course, programme=programme)
 	
 	if success:
@@ -471,7 +545,7 @@ def login():
 		return render_template("login.html", errors=["Invalid email or password"]), 401
 	
 	# Verify password
-	if not check_password_hash(user["password"], password):
+	if not run_password_task(verify_password, user["password"], password):
 		return render_template("login.html", errors=["Invalid email or password"]), 401
 	
 	# Login successful - create session
@@ -513,12 +587,14 @@ def upload():
 
 	ext = filename.rsplit(".", 1)[1].lower()
 	if ext == "pdf":
-		content = extract_text_from_pdf(path)
+		# Pages are tokenized as they are extracted instead of joining the whole text first.
+		content = iter_pdf_text(path)
 	else:
 		content = read_text_file(path)
 
 	title = os.path.splitext(filename)[0]
 	search_index.add_document(title=title, content=content, filename=filename)
+	_autocomplete_suggestions.cache_clear()
 	return redirect(url_for("index"))
 
 
@@ -551,6 +627,7 @@ def delete_uploaded_item():
 
 	if filename:
 		search_index.remove_document_by_filename(filename)
+		_autocomplete_suggestions.cache_clear()
 
 	return redirect(url_for("index"))
 
@@ -785,20 +862,34 @@ def clear_history():
 	return redirect(request.referrer or url_for("index"))
 
 
+@lru_cache(maxsize=4096)
+def _autocomplete_suggestions(last_token: str):
+	"""Memoized trie lookup; cleared whenever the index changes."""
+	suggestions, truncated = search_index.autocomplete(last_token, limit=8)
+	return tuple(suggestions), truncated
+
+
 @app.route("/autocomplete")
 @login_required
 def autocomplete():
 	query = request.args.get("q", "")
 	if not query:
-		return jsonify({"suggestions": []})
+		return jsonify({"suggestions": [], "truncated": False})
 
 	last_token = query.strip().split()[-1].lower() if query.strip() else ""
-	suggestions = search_index.trie.autocomplete(last_token, limit=8)
-	return jsonify({
+	suggestions, truncated = _autocomplete_suggestions(last_token)
+	response = jsonify({
 		"suggestions": [
 			{"term": term, "frequency": frequency} for term, frequency in suggestions
-		]
+		],
+		"truncated": truncated,
 	})
+	# Let the browser reuse suggestions while typing; the ETag follows the body, so
+	# revalidation still picks up newly indexed documents.
+	response.cache_control.private = True
+	response.cache_control.max_age = 60
+	response.add_etag()
+	return response.make_conditional(request)
 
 
 @app.route("/files/<path:filename>")
@@ -815,10 +906,17 @@ def serve_file(filename: str):
 		else:
 			abort(404)
 	as_attachment = request.args.get("download") == "1"
-	return send_from_directory(os.path.dirname(path), os.path.basename(path), as_attachment=as_attachment)
+	return send_from_directory(
+		os.path.dirname(path),
+		os.path.basename(path),
+		as_attachment=as_attachment,
+		conditional=True,
+		etag=True,
+	)
 
 
 if __name__ == "__main__":
 	ensure_upload_dir()
-	app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)), debug=True)
+	# Development server only; use gunicorn in production (see README).
+	app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)), debug=os.environ.get("FLASK_DEBUG") == "1")
 
@@ -5,24 +5,133 @@ Handles user management and authentication operations
 
 import sqlite3
 import os
+import queue
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
 
 # Database file path
 DB_PATH = Path(__file__).parent / "users.db"
 
+# Connection tuning: WAL lets readers run alongside a writer, busy_timeout waits
+# on locks instead of failing, and synchronous=NORMAL is safe under WAL.
+CONNECTION_PRAGMAS = (
+	"PRAGMA journal_mode=WAL",
+	"PRAGMA busy_timeout=5000",
+	"PRAGMA synchronous=NORMAL",
+	"PRAGMA cache_size=-20000",
+	"PRAGMA temp_store=MEMORY",
+	"PRAGMA foreign_keys=ON",
+)
+
+# Idle connections kept open for reuse; requests check one out and hand it back on
+# teardown, so each request does not pay for a fresh connect and PRAGMA round-trip
+POOL_SIZE = 8
+_pool = queue.LifoQueue(maxsize=POOL_SIZE)
+
+# Connection checked out by the current request (per thread, or per greenlet under gevent)
+_current = ContextVar("db_connection", default=None)
+
+INSERT_USER_SQL = """
+	INSERT INTO users (name, email, password, role, phone, department, course, programme, profile_image)
+	VALUES (:name, :email, :password, :role, :phone, :department, :course, :programme, :profile_image)
+"""
+
+USER_DEFAULTS = {
+	"role": "Student",
+	"phone": "",
+	"department": "",
+	"course": "",
+	"programme": "",
+	"profile_image": "",
+}
+
+
+def _apply_pragmas(conn):
+	"""
+	Apply the connection tuning PRAGMAs to a freshly opened connection
+	
+	Args:
+		conn (sqlite3.Connection): Connection to configure
+	"""
+	for pragma in CONNECTION_PRAGMAS:
+		conn.execute(pragma)
+
 
 def get_connection():
 	"""
-	Create and return a database connection
+	Return the current request's database connection, taking one from the pool on first use
+	
+	The connection stays checked out until release_connection() is called
+	(the Flask app does this on app-context teardown); callers must not close it.
 	
 	Returns:
 		sqlite3.Connection: Database connection object
 	"""
-	conn = sqlite3.connect(str(DB_PATH))
-	conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+	conn = _current.get()
+	if conn is None:
+		try:
+			conn = _pool.get_nowait()
+		except queue.Empty:
+			# Pooled connections are handed between threads, so skip sqlite's same-thread check
+			conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+			conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+			_apply_pragmas(conn)
+		_current.set(conn)
 	return conn
 
 
+def release_connection():
+	"""
+	Return the current request's connection to the pool, if one is checked out
+	
+	Any transaction left open is rolled back first. The connection is closed
+	instead when the pool already holds POOL_SIZE idle connections.
+	"""
+	conn = _current.get()
+	if conn is None:
+		return
+	_current.set(None)
+	try:
+		if conn.in_transaction:
+			conn.rollback()
+		_pool.put_nowait(conn)
+	except (sqlite3.Error, queue.Full):
+		conn.close()
+
+
+@contextmanager
+def transaction():
+	"""
+	Run several writes as one transaction on the current request's connection
+	
+	BEGIN IMMEDIATE takes the write lock up front, so concurrent writers wait
+	on busy_timeout instead of failing mid-transaction. Commits on success and
+	rolls back on any exception. Nested use joins the outer transaction.
+	
+	Yields:
+		sqlite3.Cursor: Cursor bound to the open transaction
+	
+	Example:
+		with transaction() as cursor:
+			add_user("John Doe", "john@university.edu", "hashed_password", cursor=cursor)
+			cursor.execute("UPDATE users SET role = 'Admin' WHERE email = ?", ("john@university.edu",))
+	"""
+	conn = get_connection()
+	if conn.in_transaction:
+		yield conn.cursor()
+		return
+
+	conn.execute("BEGIN IMMEDIATE")
+	try:
+		yield conn.cursor()
+	except BaseException:
+		conn.rollback()
+		raise
+	else:
+		conn.commit()
+
+
 def init_db():
 	"""
 	Initialize the database by creating the users table if it doesn't exist
@@ -36,37 +145,37 @@ def init_db():
 	- created_at: Timestamp of account creation (datetime)
 	"""
 	conn = get_connection()
-	cursor = conn.cursor()
-	
-	# Create users table
-	cursor.execute("""
-		CREATE TABLE IF NOT EXISTS users (
-			id INTEGER PRIMARY KEY AUTOINCREMENT,
-			name TEXT NOT NULL,
-			email TEXT NOT NULL UNIQUE,
-			password TEXT NOT NULL,
-			role TEXT NOT NULL DEFAULT 'Student',
-			phone TEXT DEFAULT '',
-			department TEXT DEFAULT '',
-			course TEXT DEFAULT '',
-			programme TEXT DEFAULT '',
-			profile_image TEXT DEFAULT '',
-			created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-		)
-	""")
-	# 1. Ensure legacy databases have fields when not present
-	for col in ["phone", "department", "course", "programme", "profile_image"]:
-		try:
-			cursor.execute(f"ALTER TABLE users ADD COLUMN {col} TEXT DEFAULT ''")
-		except Exception:
-			pass
 	
-	conn.commit()
-	conn.close()
+	with conn:
+		cursor = conn.cursor()
+		
+		# Create users table
+		cursor.execute("""
+			CREATE TABLE IF NOT EXISTS users (
+				id INTEGER PRIMARY KEY AUTOINCREMENT,
+				name TEXT NOT NULL,
+				email TEXT NOT NULL UNIQUE,
+				password TEXT NOT NULL,
+				role TEXT NOT NULL DEFAULT 'Student',
+				phone TEXT DEFAULT '',
+				department TEXT DEFAULT '',
+				course TEXT DEFAULT '',
+				programme TEXT DEFAULT '',
+				profile_image TEXT DEFAULT '',
+				created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+			)
+		""")
+		# 1. Ensure legacy databases have fields when not present
+		for col in ["phone", "department", "course", "programme", "profile_image"]:
+			try:
+				cursor.execute(f"ALTER TABLE users ADD COLUMN {col} TEXT DEFAULT ''")
+			except Exception:
+				pass
+	
 	print(f"✓ Database initialized at {DB_PATH}")
 
 
-def add_user(name, email, password, role="Student", phone="", department="", course="", programme="", profile_image=""):
+def add_user(name, email, password, role="Student", phone="", department="", course="", programme="", profile_image="", cursor=None):
 	"""
 	Add a new user to the database
 	
@@ -75,30 +184,43 @@ def add_user(name, email, password, role="Student", phone="", department="", cou
 		email (str): User's email address (must be unique)
 		password (str): Hashed password (should be hashed before calling this function)
 		role (str): User role - 'Student' or 'Admin' (default: 'Student')
+		cursor (sqlite3.Cursor): Optional cursor from transaction() to insert as part
+			of a larger transaction; the caller then owns the commit
 	
 	Returns:
 		tuple: (success: bool, message: str)
 			- (True, "User created successfully") on success
 			- (False, error_message) on failure
 	
+	Raises:
+		sqlite3.Error: Only when cursor is given (including IntegrityError for a
+			duplicate email), so the error aborts the caller's transaction instead
+			of letting its other writes commit
+	
 	Example:
 		success, msg = add_user("John Doe", "john@university.edu", "hashed_password", "Student")
 	"""
+	row = {
+		"name": name,
+		"email": email,
+		"password": password,
+		"role": role,
+		"phone": phone,
+		"department": department,
+		"course": course,
+		"programme": programme,
+		"profile_image": profile_image,
+	}
+	if cursor is not None:
+		# Part of the caller's transaction: let errors propagate so it rolls back
+		cursor.execute(INSERT_USER_SQL, row)
+		return True, "User created successfully"
+	
 	try:
-		conn = get_connection()
-		cursor = conn.cursor()
-		
-		# Insert new user
-		cursor.execute(
-			"""
-			INSERT INTO users (name, email, password, role, phone, department, course, programme, profile_image)
-			VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-			""",
-			(name, email, password, role, phone, department, course, programme, profile_image)
-		)
+		# Insert new user; the transaction rolls back if the email is taken
+		with transaction() as cursor:
+			cursor.execute(INSERT_USER_SQL, row)
 		
-		conn.commit()
-		conn.close()
 		return True, "User created successfully"
 		
 	except sqlite3.IntegrityError:
@@ -110,48 +232,64 @@ def add_user(name, email, password, role="Student", phone="", department="", cou
 		return False, f"Error: {str(e)}"
 
 
-def get_user(email, password):
+def add_users(users):
+	"""
+	Add many users in a single transaction (e.g. seeding admin accounts)
+	
+	Args:
+		users (iterable of dict): Rows with name, email and hashed password keys;
+			role, phone, department, course, programme and profile_image are optional
+	
+	Returns:
+		tuple: (success: bool, message: str)
+			- Nothing is inserted if any email is already registered
+	
+	Example:
+		success, msg = add_users([
+			{"name": "Admin One", "email": "admin1@university.edu", "password": "hashed_password", "role": "Admin"},
+			{"name": "Admin Two", "email": "admin2@university.edu", "password": "hashed_password", "role": "Admin"},
+		])
+	"""
+	try:
+		with transaction() as cursor:
+			cursor.executemany(INSERT_USER_SQL, ({**USER_DEFAULTS, **user} for user in users))
+		return True, f"{cursor.rowcount} users created"
+		
+	except sqlite3.IntegrityError:
+		return False, "Email already registered"
+	except sqlite3.Error as e:
+		return False, f"Database error: {str(e)}"
+	except Exception as e:
+		return False, f"Error: {str(e)}"
+
+
+def email_exists(email):
 	"""
-	Retrieve a user by email and password (for login)
+	Check whether an email is already registered (for signup validation)
+	
+	Only probes the unique email index; no row is fetched.
 	
 	Args:
 		email (str): User's email address
-		password (str): User's password (should be hashed before comparison)
 	
 	Returns:
-		dict: User record {id, name, email, password, role, created_at} if found
-		None: If no matching user found
+		bool: True if a user with this email exists, False otherwise
 	
 	Example:
-		user = get_user("john@university.edu", "hashed_password")
-		if user:
-			print(f"Login successful for {user['name']}")
+		if email_exists("john@university.edu"):
+			print("Email already registered")
 	"""
 	try:
 		conn = get_connection()
-		cursor = conn.cursor()
-		
-		# Query user by email and password
-		cursor.execute(
-			"""
-			SELECT * FROM users
-			WHERE email = ? AND password = ?
-			""",
-			(email, password)
-		)
-		
-		user = cursor.fetchone()
-		conn.close()
-		
-		# Convert sqlite3.Row to dictionary for easier access
-		return dict(user) if user else None
+		cursor = conn.execute("SELECT 1 FROM users WHERE email = ? LIMIT 1", (email,))
+		return cursor.fetchone() is not None
 		
 	except sqlite3.Error as e:
 		print(f"Database error: {str(e)}")
-		return None
+		return False
 	except Exception as e:
 		print(f"Error: {str(e)}")
-		return None
+		return False
 
 
 def get_user_by_email(email):
@@ -185,7 +323,6 @@ def get_user_by_email(email):
 		)
 		
 		user = cursor.fetchone()
-		conn.close()
 		
 		# Convert sqlite3.Row to dictionary
 		return dict(user) if user else None
@@ -216,7 +353,6 @@ def get_all_users():
 		
 		cursor.execute("SELECT * FROM users ORDER BY created_at DESC")
 		users = cursor.fetchall()
-		conn.close()
 		
 		return [dict(user) for user in users]
 		
@@ -243,16 +379,13 @@ def delete_user(email):
 	"""
 	try:
 		conn = get_connection()
-		cursor = conn.cursor()
 		
-		cursor.execute("DELETE FROM users WHERE email = ?", (email,))
-		conn.commit()
+		with conn:
+			cursor = conn.execute("DELETE FROM users WHERE email = ?", (email,))
 		
 		if cursor.rowcount > 0:
-			conn.close()
 			return True, "User deleted successfully"
 		else:
-			conn.close()
 			return False, "User not found"
 			
 	except sqlite3.Error as e:
@@ -269,8 +402,6 @@ def update_user_profile(email, name=None, phone=None, department=None, course=No
 		if not any([name, phone, department, course, programme, profile_image]):
 			return False, "No values to update"
 
-		conn = get_connection()
-		cursor = conn.cursor()
 		fields = []
 		params = []
 		if name is not None:
@@ -293,9 +424,9 @@ def update_user_profile(email, name=None, phone=None, department=None, course=No
 			params.append(profile_image)
 
 		params.append(email)
-		cursor.execute(f"UPDATE users SET {', '.join(fields)} WHERE email = ?", params)
-		conn.commit()
-		conn.close()
+		conn = get_connection()
+		with conn:
+			cursor = conn.execute(f"UPDATE users SET {', '.join(fields)} WHERE email = ?", params)
 		if cursor.rowcount > 0:
 			return True, "Profile updated"
 		return False, "User not found"
@@ -322,16 +453,13 @@ def update_user_role(email, new_role):
 			return False, "Invalid role. Must be 'Student' or 'Admin'"
 		
 		conn = get_connection()
-		cursor = conn.cursor()
 		
-		cursor.execute("UPDATE users SET role = ? WHERE email = ?", (new_role, email))
-		conn.commit()
+		with conn:
+			cursor = conn.execute("UPDATE users SET role = ? WHERE email = ?", (new_role, email))
 		
 		if cursor.rowcount > 0:
-			conn.close()
 			return True, f"User role updated to {new_role}"
 		else:
-			conn.close()
 			return False, "User not found"
 			
 	except sqlite3.Error as e:
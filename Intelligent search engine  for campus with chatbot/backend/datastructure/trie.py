@@ -1,26 +1,51 @@
-from collections import deque
-from typing import Dict, List, Optional, Tuple
+import heapq
+from typing import Dict, List, Optional, Set, Tuple
+
+# Upper bound on nodes visited per autocomplete call, so short prefixes over a large
+# vocabulary cannot turn into a full-trie walk.
+DEFAULT_MAX_VISITS = 5000
 
 
 class TrieNode:
+	__slots__ = ("children", "is_end", "frequency", "doc_ids")
+
 	def __init__(self):
 		self.children: Dict[str, "TrieNode"] = {}
 		self.is_end = False
 		self.frequency = 0
+		# Doc ids of every word passing through this node; only allocated for words
+		# inserted with a doc_id (e.g. filename tries).
+		self.doc_ids: Optional[Set[int]] = None
 
 
 class Trie:
 	def __init__(self):
 		self.root = TrieNode()
 
-	def insert(self, word: str) -> None:
+	def insert(self, word: str, freq: int = 1, doc_id: Optional[int] = None) -> None:
 		node = self.root
 		for ch in word:
-			if ch not in node.children:
-				node.children[ch] = TrieNode()
-			node = node.children[ch]
+			children = node.children
+			child = children.get(ch)
+			if child is None:
+				child = children[ch] = TrieNode()
+			node = child
+			if doc_id is not None:
+				if node.doc_ids is None:
+					node.doc_ids = set()
+				node.doc_ids.add(doc_id)
 		node.is_end = True
-		node.frequency += 1
+		node.frequency += freq
+
+	def remove_doc_id(self, word: str, doc_id: int) -> None:
+		"""Detach ``doc_id`` from ``word`` and every prefix of it."""
+		node = self.root
+		for ch in word:
+			node = node.children.get(ch)
+			if node is None:
+				return
+			if node.doc_ids:
+				node.doc_ids.discard(doc_id)
 
 	def _walk(self, prefix: str) -> Optional[TrieNode]:
 		node = self.root
@@ -30,19 +55,54 @@ class Trie:
 			node = node.children[ch]
 		return node
 
-	def autocomplete(self, prefix: str, limit: int = 10) -> List[str]:
+	def doc_ids_with_prefix(self, prefix: str) -> Set[int]:
+		"""Return the doc ids attached to every word starting with ``prefix``."""
+		node = self._walk(prefix)
+		if not node or not node.doc_ids:
+			return set()
+		return set(node.doc_ids)
+
+	def autocomplete(self, prefix: str, limit: int = 10, max_visits: int = DEFAULT_MAX_VISITS) -> List[str]:
+		suggestions, _ = self.autocomplete_with_frequency(prefix, limit, max_visits)
+		return [term for term, _ in suggestions]
+
+	def autocomplete_with_frequency(
+		self,
+		prefix: str,
+		limit: int = 10,
+		max_visits: int = DEFAULT_MAX_VISITS,
+	) -> Tuple[List[Tuple[str, int]], bool]:
+		"""Return ``(suggestions, truncated)``, where ``truncated`` means the visit cap was hit."""
 		node = self._walk(prefix)
 		if not node:
-			return []
+			return [], False
+
+		if limit <= 0:
+			return [], False
 
-		results: List[Tuple[str, int]] = []
-		queue = deque([(node, prefix)])
-		while queue:
-			current, current_prefix = queue.popleft()
+		# Min-heap of (frequency, -visit_order, term) holding only the best `limit` matches.
+		best: List[Tuple[int, int, str]] = []
+		# Characters below the prefix node; terms are only joined when they enter the heap.
+		suffix: List[str] = []
+		stack: List[Tuple[TrieNode, int, str]] = [(node, 0, "")]
+		visit_order = 0
+		truncated = False
+		while stack:
+			if visit_order >= max_visits:
+				truncated = True
+				break
+			current, depth, ch = stack.pop()
+			del suffix[depth:]
+			if ch:
+				suffix.append(ch)
 			if current.is_end:
-				results.append((current_prefix, current.frequency))
-			for ch, child in current.children.items():
-				queue.append((child, current_prefix + ch))
+				rank = (current.frequency, -visit_order)
+				if len(best) < limit:
+					heapq.heappush(best, (*rank, prefix + "".join(suffix)))
+				elif rank > best[0][:2]:
+					heapq.heapreplace(best, (*rank, prefix + "".join(suffix)))
+			visit_order += 1
+			for child_ch, child in reversed(current.children.items()):
+				stack.append((child, len(suffix), child_ch))
 
-		results.sort(key=lambda item: item[1], reverse=True)
-		return [term for term, _ in results[:limit]]
+		return [(term, frequency) for frequency, _, term in sorted(best, reverse=True)], truncated
@@ -1,4 +1,9 @@
-from typing import Optional
+from typing import Iterator
+
+try:
+	import pypdfium2 as pdfium
+except Exception:  # pragma: no cover - optional import for environments without pypdfium2
+	pdfium = None
 
 try:
 	from PyPDF2 import PdfReader
@@ -6,11 +11,43 @@ except Exception:  # pragma: no cover - optional import for environments without
 	PdfReader = None
 
 
-def extract_text_from_pdf(path: str) -> str:
-	if not PdfReader:
-		return ""
+def _iter_pdfium_pages(path: str) -> Iterator[str]:
+	pdf = pdfium.PdfDocument(path)
 	try:
-		reader = PdfReader(path)
-		return "\n".join(page.extract_text() or "" for page in reader.pages)
+		for index in range(len(pdf)):
+			page = pdf[index]
+			textpage = page.get_textpage()
+			try:
+				yield textpage.get_text_range()
+			finally:
+				textpage.close()
+				page.close()
+	finally:
+		pdf.close()
+
+
+def _iter_pypdf2_pages(path: str) -> Iterator[str]:
+	reader = PdfReader(path)
+	for page in reader.pages:
+		yield page.extract_text() or ""
+
+
+def iter_pdf_text(path: str) -> Iterator[str]:
+	"""Yield the text of each non-empty page, stopping quietly on unreadable PDFs."""
+	# PDFium's native text extraction is much faster than PyPDF2; PyPDF2 stays as the fallback.
+	if pdfium:
+		iter_pages = _iter_pdfium_pages
+	elif PdfReader:
+		iter_pages = _iter_pypdf2_pages
+	else:
+		return
+	try:
+		for text in iter_pages(path):
+			if text.strip():
+				yield text
 	except Exception:
-		return ""
+		return
+
+
+def extract_text_from_pdf(path: str) -> str:
+	return "\n".join(iter_pdf_text(path))
@@ -1,12 +1,28 @@
+import math
+import os
+import pickle
 import re
-from typing import Dict, List, Tuple
+import threading
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from itertools import repeat
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+try:
+	import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+	fcntl = None
+
+try:
+	import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+	np = None
 
-from datastructure.hashtable import HashTable
-from datastructure.linkedlist import LinkedList, Posting
 from datastructure.trie import Trie
 
 
-STOPWORDS = {
+STOPWORDS = frozenset({
 	"a",
 	"an",
 	"and",
@@ -40,78 +56,250 @@ STOPWORDS = {
 	"was",
 	"will",
 	"with",
-}
+})
+
+_TOKEN_RE = re.compile(r"[a-zA-Z0-9]+")
+
+# Bump when the pickled index layout changes; files from other versions are ignored
+# and the index starts empty, so documents have to be uploaded again.
+INDEX_FORMAT_VERSION = 3
+
+# Postings are stored as parallel arrays (doc ids, term frequencies) rather than
+# one object per posting, keeping each term's postings contiguous in memory.
+Postings = Tuple[array, array]
+
+# BM25 term-frequency saturation and document-length normalization.
+BM25_K1 = 1.2
+BM25_B = 0.75
 
 
 def tokenize(text: str) -> List[str]:
-	tokens = re.findall(r"[a-zA-Z0-9]+", text.lower())
-	return [token for token in tokens if token not in STOPWORDS]
+	return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
 
 
 class CampusSearchEngine:
-	def __init__(self):
-		self.inverted_index = HashTable()
+	def __init__(self, index_path: Optional[str] = None):
+		self.index_path = index_path
+		self.inverted_index: Dict[str, Postings] = {}
 		self.trie = Trie()
+		# Lower-cased filenames for prefix lookups.
+		self.filename_trie = Trie()
 		self.documents: Dict[int, Dict[str, str]] = {}
 		self.doc_counter = 0
+		# Indexed token count per doc id (slot 0 unused), derived from the postings.
+		self.doc_lengths = array("I", [0])
+		self.total_length = 0
+		# Guards every read and write when several server threads share this instance.
+		self._lock = threading.RLock()
+		self._index_mtime: Optional[int] = None
+		if index_path:
+			self._load_index(index_path)
+
+	def refresh(self) -> bool:
+		"""Reload the saved index if another worker process has written a newer copy."""
+		if not self.index_path:
+			return False
+		try:
+			mtime = os.stat(self.index_path).st_mtime_ns
+		except OSError:
+			return False
+		if mtime == self._index_mtime:
+			return False
+
+		# Load into a separate engine so a failed or partial read leaves the current
+		# index untouched.
+		fresh = CampusSearchEngine()
+		if not fresh._load_index(self.index_path):
+			self._index_mtime = mtime
+			return False
+		with self._lock:
+			self.documents = fresh.documents
+			self.doc_counter = fresh.doc_counter
+			self.inverted_index = fresh.inverted_index
+			self.doc_lengths = fresh.doc_lengths
+			self.total_length = fresh.total_length
+			self.trie = fresh.trie
+			self.filename_trie = fresh.filename_trie
+			self._index_mtime = fresh._index_mtime
+		return True
+
+	@contextmanager
+	def _write_lock(self) -> Iterator[None]:
+		"""Serialize a modification across threads and, via flock, across worker processes.
+
+		The saved index is reloaded first, so doc ids and the saved file always build
+		on the latest copy written by any worker.
+		"""
+		with self._lock:
+			lock_file = None
+			if self.index_path and fcntl is not None:
+				try:
+					lock_file = open(f"{self.index_path}.lock", "a")
+				except OSError:
+					lock_file = None
+				else:
+					fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+			try:
+				self.refresh()
+				yield
+			finally:
+				if lock_file is not None:
+					lock_file.close()
+
+	def _save_index(self, path: Optional[str] = None) -> None:
+		"""Persist documents and postings so a restart does not re-ingest files."""
+		path = path or self.index_path
+		if not path:
+			return
+		state = {
+			"version": INDEX_FORMAT_VERSION,
+			"documents": self.documents,
+			"doc_counter": self.doc_counter,
+			"inverted_index": self.inverted_index,
+		}
+		tmp_path = f"{path}.tmp"
+		try:
+			with open(tmp_path, "wb") as file:
+				pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+			os.replace(tmp_path, path)
+			if path == self.index_path:
+				self._index_mtime = os.stat(path).st_mtime_ns
+		except OSError:
+			pass
+
+	def _load_index(self, path: str) -> bool:
+		"""Restore a saved index, leaving the engine as it was if the file is missing, unreadable or from another version."""
+		if not os.path.isfile(path):
+			return False
+		try:
+			mtime = os.stat(path).st_mtime_ns
+			with open(path, "rb") as file:
+				state = pickle.load(file)
+		except Exception:
+			return False
+		if not isinstance(state, dict) or state.get("version") != INDEX_FORMAT_VERSION:
+			return False
+		self._index_mtime = mtime
+
+		self.documents = state["documents"]
+		self.doc_counter = state["doc_counter"]
+		self.inverted_index = state["inverted_index"]
+		self._rebuild_filename_trie()
+		self._rebuild_trie()
+		self._rebuild_doc_lengths()
+		return True
+
+	def _rebuild_doc_lengths(self) -> None:
+		self.doc_lengths = array("I", repeat(0, self.doc_counter + 1))
+		for term_doc_ids, term_freqs in self.inverted_index.values():
+			for doc_id, term_freq in zip(term_doc_ids, term_freqs):
+				self.doc_lengths[doc_id] += term_freq
+		self.total_length = sum(self.doc_lengths)
 
-	def _index_document_content(self, doc_id: int, content: str) -> None:
-		tokens = tokenize(content)
-		if not tokens:
+	def _rebuild_trie(self) -> None:
+		# The trie is derived from the postings rather than pickled, since deep tries
+		# can exceed pickle's recursion limit.
+		self.trie = Trie()
+		for term, (_, term_freqs) in self.inverted_index.items():
+			self.trie.insert(term, sum(term_freqs))
+
+	def _index_filename(self, doc_id: int, filename: str) -> None:
+		name = filename.lower()
+		if not name:
 			return
+		self.filename_trie.insert(name, doc_id=doc_id)
+
+	def _rebuild_filename_trie(self) -> None:
+		self.filename_trie = Trie()
+		for doc_id, meta in self.documents.items():
+			self._index_filename(doc_id, meta.get("filename", ""))
 
-		term_counts: Dict[str, int] = {}
-		for token in tokens:
-			term_counts[token] = term_counts.get(token, 0) + 1
+	def _index_terms(self, doc_id: int, term_counts: Dict[str, int]) -> None:
+		# Record the document length before publishing any postings, so a search that
+		# sees the new doc id can always look up its length.
+		missing = doc_id + 1 - len(self.doc_lengths)
+		if missing > 0:
+			self.doc_lengths.extend(repeat(0, missing))
+		length = sum(term_counts.values())
+		self.doc_lengths[doc_id] = length
+		self.total_length += length
 
 		for term, freq in term_counts.items():
 			postings = self.inverted_index.get(term)
 			if postings is None:
-				postings = LinkedList()
-				self.inverted_index.set(term, postings)
-			postings.append(Posting(doc_id, freq))
-			self.trie.insert(term)
+				postings = self.inverted_index[term] = (array("I"), array("I"))
+			postings[0].append(doc_id)
+			postings[1].append(freq)
+			self.trie.insert(term, freq)
 
-	def add_document(self, title: str, content: str, filename: str, category: str = None) -> int:
-		"""Add document to index with optional category metadata."""
+	def add_document(
+		self,
+		title: str,
+		content: Union[str, Iterable[str]],
+		filename: str,
+		category: str = None,
+	) -> int:
+		"""Add document to index with optional category metadata.
+
+		``content`` may be a string or an iterable of text chunks (e.g. PDF pages),
+		which are tokenized one at a time so the full text is never held in memory.
+		"""
 		if category is None:
 			category = self._infer_category(filename)
 
-		search_text = " ".join(part for part in [title, filename, content] if part)
-		tokens = tokenize(search_text)
-		if not tokens:
+		chunks = [content] if isinstance(content, str) else content
+		term_counts: Counter = Counter()
+		length = len(tokenize(f"{title} {filename}"))
+		for chunk in chunks:
+			tokens = tokenize(chunk)
+			term_counts.update(tokens)
+			length += len(tokens)
+		if not length:
 			return -1
 
-		self.doc_counter += 1
-		doc_id = self.doc_counter
-		self.documents[doc_id] = {
-			"title": title,
-			"filename": filename,
-			"content": content,
-			"length": str(len(tokens)),
-			"category": category,
-		}
+		with self._write_lock():
+			self.doc_counter += 1
+			doc_id = self.doc_counter
+			self.documents[doc_id] = {
+				"title": title,
+				"filename": filename,
+				"length": str(length),
+				"category": category,
+			}
 
-		self._index_document_content(doc_id, content)
+			self._index_terms(doc_id, term_counts)
+			self._index_filename(doc_id, filename)
+			self._save_index()
 
 		return doc_id
 
-	def _rebuild_indexes(self) -> None:
-		self.inverted_index = HashTable()
-		self.trie = Trie()
-		for doc_id, meta in self.documents.items():
-			self._index_document_content(doc_id, meta.get("content", ""))
+	def _drop_postings(self, doc_ids: Set[int]) -> None:
+		for term, (term_doc_ids, term_freqs) in list(self.inverted_index.items()):
+			kept = [index for index, doc_id in enumerate(term_doc_ids) if doc_id not in doc_ids]
+			if not kept:
+				del self.inverted_index[term]
+			elif len(kept) < len(term_doc_ids):
+				self.inverted_index[term] = (
+					array("I", (term_doc_ids[index] for index in kept)),
+					array("I", (term_freqs[index] for index in kept)),
+				)
 
 	def remove_document_by_filename(self, filename: str) -> int:
 		"""Remove indexed documents that match a filename."""
-		matching_ids = [doc_id for doc_id, meta in self.documents.items() if meta.get("filename") == filename]
-		if not matching_ids:
-			return 0
+		with self._write_lock():
+			matching_ids = [doc_id for doc_id, meta in self.documents.items() if meta.get("filename") == filename]
+			if not matching_ids:
+				return 0
 
-		for doc_id in matching_ids:
-			self.documents.pop(doc_id, None)
+			for doc_id in matching_ids:
+				self.documents.pop(doc_id, None)
+				self.total_length -= self.doc_lengths[doc_id]
+				self.doc_lengths[doc_id] = 0
+				self.filename_trie.remove_doc_id(filename.lower(), doc_id)
 
-		self._rebuild_indexes()
+			self._drop_postings(set(matching_ids))
+			self._rebuild_trie()
+			self._save_index()
 		return len(matching_ids)
 
 	def _infer_category(self, filename: str) -> str:
@@ -129,30 +317,37 @@ class CampusSearchEngine:
 			return "Documents"
 		return "General"
 
-	def keyword_search(self, query: str) -> List[Tuple[int, int]]:
-		return self._search(query, prefix=False)
+	def keyword_search(self, query: str) -> List[Tuple[int, float]]:
+		with self._lock:
+			return self._search(query, prefix=False)
 
-	def prefix_search(self, query: str) -> List[Tuple[int, int]]:
-		return self._search(query, prefix=True)
+	def prefix_search(self, query: str) -> List[Tuple[int, float]]:
+		with self._lock:
+			return self._search(query, prefix=True)
+
+	def autocomplete(self, prefix: str, limit: int = 8) -> Tuple[List[Tuple[str, int]], bool]:
+		"""Return ``(suggestions, truncated)`` for a prefix, as ``Trie.autocomplete_with_frequency``."""
+		with self._lock:
+			return self.trie.autocomplete_with_frequency(prefix, limit=limit)
 
 	def filename_search(self, query: str, prefix: bool = False) -> List[Tuple[int, int]]:
 		query_value = query.strip().lower()
 		if not query_value:
 			return []
-		ranked: List[Tuple[int, int]] = []
-		for doc_id, meta in self.documents.items():
-			filename = meta.get("filename", "").lower()
-			if not filename:
-				continue
+		with self._lock:
 			if prefix:
-				is_match = filename.startswith(query_value)
+				doc_ids = self.filename_trie.doc_ids_with_prefix(query_value)
 			else:
-				is_match = query_value in filename
-			if is_match:
-				ranked.append((doc_id, 1))
-		return ranked
+				# Substring matches stay a linear scan: indexing every suffix costs
+				# memory quadratic in the filename length.
+				doc_ids = {
+					doc_id
+					for doc_id, meta in self.documents.items()
+					if query_value in meta.get("filename", "").lower()
+				}
+			return [(doc_id, 1) for doc_id in sorted(doc_ids)]
 
-	def _search(self, query: str, prefix: bool) -> List[Tuple[int, int]]:
+	def _search(self, query: str, prefix: bool) -> List[Tuple[int, float]]:
 		query_tokens = tokenize(query)
 		if not query_tokens:
 			return []
@@ -164,12 +359,40 @@ class CampusSearchEngine:
 			else:
 				candidate_terms.append(token)
 
-		doc_scores: Dict[int, int] = {}
-		for term in candidate_terms:
-			postings = self.inverted_index.get(term)
-			if not postings:
-				continue
-			for posting in postings.items():
-				doc_scores[posting.doc_id] = doc_scores.get(posting.doc_id, 0) + posting.term_freq
+		matched = [self.inverted_index[term] for term in candidate_terms if term in self.inverted_index]
+		if not matched:
+			return []
+		avg_length = self.total_length / max(len(self.documents), 1) or 1.0
+		if np is not None:
+			return self._score_vectorized(matched, avg_length)
+
+		# BM25: idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))
+		doc_scores: Dict[int, float] = {}
+		for term_doc_ids, term_freqs in matched:
+			idf = self._idf(len(term_doc_ids))
+			for doc_id, term_freq in zip(term_doc_ids, term_freqs):
+				norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / avg_length)
+				score = idf * term_freq * (BM25_K1 + 1) / (term_freq + norm)
+				doc_scores[doc_id] = doc_scores.get(doc_id, 0.0) + score
 
 		return sorted(doc_scores.items(), key=lambda item: item[1], reverse=True)
+
+	def _idf(self, doc_freq: int) -> float:
+		total_docs = len(self.documents)
+		return math.log(1 + (total_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+	def _score_vectorized(self, matched: List[Postings], avg_length: float) -> List[Tuple[int, float]]:
+		scores = np.zeros(self.doc_counter + 1)
+		doc_lengths = np.asarray(self.doc_lengths, dtype=np.float64)
+		for term_doc_ids, term_freqs in matched:
+			# Doc ids are unique within a term, so plain fancy-index addition is safe here.
+			# Copy instead of viewing the array's buffer: a live view makes a concurrent
+			# append to the same postings raise BufferError.
+			ids = np.array(term_doc_ids, dtype=np.intp)
+			freqs = np.asarray(term_freqs, dtype=np.float64)
+			norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths[ids] / avg_length)
+			scores[ids] += self._idf(len(ids)) * freqs * (BM25_K1 + 1) / (freqs + norm)
+
+		doc_ids = np.flatnonzero(scores)
+		doc_ids = doc_ids[np.argsort(-scores[doc_ids], kind="stable")]
+		return [(int(doc_id), float(scores[doc_id])) for doc_id in doc_ids]
@@ -262,12 +262,15 @@ async function fetchAutocomplete(query) {
 
 		const data = await response.json();
 
+		// Ignore responses for a query the user has already typed past
+		if (query !== state.currentQuery) return;
+
 		if (!data.suggestions || data.suggestions.length === 0) {
 			clearSuggestions();
 			return;
 		}
 
-		renderSuggestions(data.suggestions);
+		renderSuggestions(data.suggestions, data.truncated);
 	} catch (error) {
 		console.error('Autocomplete error:', error);
 		clearSuggestions();
@@ -276,10 +279,15 @@ async function fetchAutocomplete(query) {
 
 /**
  * Render autocomplete suggestions
+ * When the server capped its lookup, hint that a longer prefix gives better matches
  */
-function renderSuggestions(suggestions) {
+function renderSuggestions(suggestions, truncated = false) {
 	if (!elements.suggestionsContainer) return;
 
+	const hint = truncated
+		? '<div class="suggestion-hint">Keep typing to narrow suggestions…</div>'
+		: '';
+
 	elements.suggestionsContainer.innerHTML = suggestions
 		.map((item, index) => `
 			<button 
@@ -292,7 +300,7 @@ function renderSuggestions(suggestions) {
 				${item.frequency ? `<span class="frequency">(${item.frequency})</span>` : ''}
 			</button>
 		`)
-		.join('');
+		.join('') + hint;
 
 	elements.suggestionsContainer.hidden = false;
 }